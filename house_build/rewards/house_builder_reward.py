@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, List, Mapping
+from typing import Any, Callable, Dict, List, Mapping, Tuple
 
 from LLM_Collab_Minecraft.house_build.utils.house_builder import (
     TaskSpec,
+    build_expected_map,
     compute_resource_limits,
     extract_command_lines,
     normalize_block_id,
@@ -51,6 +52,16 @@ def _task_from_batch_item(item: Mapping[str, Any]) -> TaskSpec:
     )
 
 
+def _task_cache_key(task: TaskSpec) -> Tuple[Any, ...]:
+    return (
+        task.task_id,
+        tuple(task.local_bbox_from),
+        tuple(task.local_bbox_to),
+        tuple(sorted(task.inventory.items())),
+        tuple((y, tuple(rows)) for y, rows in sorted(task.layers_by_y.items())),
+    )
+
+
 def _get_rpg_state(cfg: Dict[str, Any]) -> Dict[str, Any]:
     state = cfg.get("_rpg_state")
     if isinstance(state, dict):
@@ -131,6 +142,18 @@ def get_reward_function(*, cfg: Dict[str, Any], num_agents: int) -> Callable[...
     debug_render_layers = True
     rpg_state = _get_rpg_state(cfg)
 
+    task_state_cache: Dict[Tuple[Any, ...], Tuple[Dict[Tuple[int, int, int], str], Dict[str, int] | None]] = {}
+
+    def _task_state(task: TaskSpec) -> Tuple[Dict[Tuple[int, int, int], str], Dict[str, int] | None]:
+        key = _task_cache_key(task)
+        state = task_state_cache.get(key)
+        if state is None:
+            expected_map = build_expected_map(task)
+            resource_limits = compute_resource_limits(task, num_agents=num_agents) if limited_resource else None
+            state = (expected_map, resource_limits)
+            task_state_cache[key] = state
+        return state
+
     def _allowed_blocks_for_task(task: TaskSpec, overrides: List[str]) -> List[str]:
         if overrides:
             return unique_block_list(overrides)
@@ -209,7 +232,7 @@ def get_reward_function(*, cfg: Dict[str, Any], num_agents: int) -> Callable[...
                 turn_idx = batch_item.get("_house_build_turn")
 
             allowed_blocks = _allowed_blocks_for_task(task, block_agent1_override)
-            resource_limits = compute_resource_limits(task, num_agents=num_agents) if limited_resource else None
+            expected_map, resource_limits = _task_state(task)
             completion = agent1_completions[0] if agent1_completions else ""
             lines = extract_command_lines(completion)
             accepted, _rejected = validate_and_normalize_mc_commands(
@@ -226,7 +249,7 @@ def get_reward_function(*, cfg: Dict[str, Any], num_agents: int) -> Callable[...
                 world_bbox_from=task.local_bbox_from,
                 world_bbox_to=task.local_bbox_to,
             )
-            metrics = score_house_builder(task=task, world_scan_blocks=blocks)
+            metrics = score_house_builder(task=task, world_scan_blocks=blocks, expected_map=expected_map)
             reward = float(metrics.get("score_mean", 0.0))
             _log_train_metrics(
                 {
@@ -282,7 +305,7 @@ def get_reward_function(*, cfg: Dict[str, Any], num_agents: int) -> Callable[...
 
         allowed_blocks_agent1 = _allowed_blocks_for_task(task, block_agent1_override)
         allowed_blocks_agent2 = _allowed_blocks_for_task(task, block_agent2_override)
-        resource_limits = compute_resource_limits(task, num_agents=num_agents) if limited_resource else None
+        expected_map, resource_limits = _task_state(task)
 
         c1 = agent1_completions[0] if agent1_completions else ""
         c2 = agent2_completions[0] if agent2_completions else ""
@@ -312,7 +335,7 @@ def get_reward_function(*, cfg: Dict[str, Any], num_agents: int) -> Callable[...
             world_bbox_from=task.local_bbox_from,
             world_bbox_to=task.local_bbox_to,
         )
-        metrics = score_house_builder(task=task, world_scan_blocks=blocks)
+        metrics = score_house_builder(task=task, world_scan_blocks=blocks, expected_map=expected_map)
         reward = float(metrics.get("score_mean", 0.0))
         spider_penalty = 0.0
         if spider_dmg_for_penalty > 0 and player_hp_for_penalty > 0:
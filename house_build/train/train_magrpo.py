@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import argparse
+import copy
 import json
 import os
 import random
@@ -18,13 +19,6 @@ except Exception as e:  # pragma: no cover
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, os.path.dirname(REPO_ROOT))
 
-from datasets import Dataset  # type: ignore
-from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
-import torch  # type: ignore
-
-from comlrl.trainers.reinforce import MAGRPOTrainer  # type: ignore
-from comlrl.utils.reward_processor import RewardProcessors  # type: ignore
-
 from LLM_Collab_Minecraft.house_build.external import (
     get_external_transition as external_get_transition,
     set_context_resolver as external_set_context_resolver,
@@ -41,7 +35,6 @@ from LLM_Collab_Minecraft.house_build.utils.house_builder import (
 )
 from LLM_Collab_Minecraft.house_build.utils.config import apply_overrides, load_yaml, resolve_path
 from LLM_Collab_Minecraft.house_build.utils.prompting import apply_prompt_defaults
-from LLM_Collab_Minecraft.house_build.utils.trainer_args import get_trainer_args
 
 
 def _slice_items(items: List[Dict[str, Any]], split_expr: Any) -> List[Dict[str, Any]]:
@@ -63,6 +56,8 @@ def _slice_items(items: List[Dict[str, Any]], split_expr: Any) -> List[Dict[str,
 
 
 def _map_dtype(dtype_cfg: Any) -> Any:
+    import torch  # type: ignore
+
     if isinstance(dtype_cfg, torch.dtype):
         return dtype_cfg
     if not isinstance(dtype_cfg, str):
@@ -79,6 +74,80 @@ def _map_dtype(dtype_cfg: Any) -> Any:
     return None
 
 
+def _resolve_attn_implementation(attn_cfg: Any, *, dtype: Any) -> str | None:
+    import torch  # type: ignore
+
+    s = str(attn_cfg or "auto").strip()
+    if s.lower() not in ("auto", "flash_attention_2"):
+        return s
+    # "auto" leaves the choice to transformers unless FA2 is usable; an explicit FA2 request falls back to sdpa.
+    fallback = None if s.lower() == "auto" else "sdpa"
+    if not torch.cuda.is_available() or dtype not in (torch.bfloat16, torch.float16):
+        return fallback
+    try:
+        import flash_attn  # type: ignore  # noqa: F401
+    except ImportError:
+        return fallback
+    return "flash_attention_2"
+
+
+def _configure_tokenizer_threads(model_cfg: Dict[str, Any]) -> None:
+    # DataLoaders run without worker processes, so the fast tokenizer can keep its Rayon pool.
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+    threads = model_cfg.get("tokenizer_threads")
+    if threads is not None:
+        os.environ["RAYON_NUM_THREADS"] = str(int(threads))
+
+
+def _placement_kwargs(model_cfg: Dict[str, Any]) -> Dict[str, Any]:
+    import torch  # type: ignore
+
+    try:
+        import accelerate  # type: ignore  # noqa: F401
+    except ImportError:
+        return {}
+    kwargs: Dict[str, Any] = {"low_cpu_mem_usage": True}
+    device_map = model_cfg.get("device_map")
+    if device_map is None and torch.cuda.is_available():
+        device_map = {"": 0}
+    if device_map is not None:
+        kwargs["device_map"] = device_map
+    return kwargs
+
+
+def _compile_agents(agents: List[Any], *, mode: str | None) -> None:
+    import torch  # type: ignore
+
+    if not torch.cuda.is_available():
+        print("model.compile requested but CUDA is unavailable; skipping torch.compile")
+        return
+    for agent in agents:
+        if not hasattr(agent, "compile"):
+            print("model.compile requested but this torch build lacks nn.Module.compile; skipping")
+            return
+        agent.compile(mode=mode, fullgraph=False)
+
+
+def _add_stop_tokens(agents: List[Any], tokenizer: Any, stop_strings: Any) -> None:
+    if isinstance(stop_strings, str):
+        stop_strings = [stop_strings]
+    stop_ids: List[int] = []
+    for s in stop_strings or []:
+        ids = tokenizer.encode(str(s), add_special_tokens=False)
+        if len(ids) != 1:
+            print(f"model.stop_strings entry {s!r} is not a single token; skipping")
+            continue
+        stop_ids.append(int(ids[0]))
+    if not stop_ids:
+        return
+    # generate() is called by the trainer, so stops go through generation_config (train and eval).
+    for agent in agents:
+        gen_cfg = agent.generation_config
+        eos = gen_cfg.eos_token_id if gen_cfg.eos_token_id is not None else tokenizer.eos_token_id
+        eos_ids = list(eos) if isinstance(eos, (list, tuple)) else [eos]
+        gen_cfg.eos_token_id = eos_ids + [i for i in stop_ids if i not in eos_ids]
+
+
 def _as_int(value: Any, default: int) -> int:
     try:
         return int(value)
@@ -252,6 +321,8 @@ def _build_formatters(cfg: Dict[str, Any], *, num_agents: int, tokenizer: Any |
             return ""
         return "Resource limits per agent (air unlimited):\n" + "\n".join(lines)
 
+    rendered_cache: Dict[str, str] = {}
+
     def _render(item: Dict[str, Any], tmpl: str) -> str:
         override = _prompt_override(item)
         if override is not None:
@@ -294,12 +365,16 @@ def _build_formatters(cfg: Dict[str, Any], *, num_agents: int, tokenizer: Any |
         resource_limits_text = _format_resource_limits(task)
         if resource_limits_text:
             user = user + "\n\n" + resource_limits_text
-        return _render_prompt(
-            tokenizer=tokenizer,
-            system_prompt=system_prompt,
-            user_prompt=user,
-            use_chat_template=use_chat_template,
-        )
+        rendered = rendered_cache.get(user)
+        if rendered is None:
+            rendered = _render_prompt(
+                tokenizer=tokenizer,
+                system_prompt=system_prompt,
+                user_prompt=user,
+                use_chat_template=use_chat_template,
+            )
+            rendered_cache[user] = rendered
+        return rendered
 
     if num_agents == 1:
         return [lambda item: _render(item, user_template)]
@@ -384,6 +459,15 @@ def main() -> int:
     eval_split = dataset_cfg.get("eval_split")
     train_items = _slice_items(items, train_split)
     eval_items = _slice_items(items, eval_split) if eval_split else []
+    # Heavy imports are deferred so --help and config/dataset errors stay fast.
+    from datasets import Dataset  # type: ignore
+    from transformers import AutoModelForCausalLM, AutoTokenizer  # type: ignore
+
+    from comlrl.trainers.reinforce import MAGRPOTrainer  # type: ignore
+    from comlrl.utils.reward_processor import RewardProcessors  # type: ignore
+
+    from LLM_Collab_Minecraft.house_build.utils.trainer_args import get_trainer_args
+
     train_ds = Dataset.from_list(train_items)
     eval_ds = Dataset.from_list(eval_items) if eval_items else None
 
@@ -398,15 +482,26 @@ def main() -> int:
     dtype = _map_dtype(model_cfg.get("dtype") or model_cfg.get("torch_dtype"))
     if dtype is not None:
         model_kwargs["torch_dtype"] = dtype
+    attn_impl = _resolve_attn_implementation(model_cfg.get("attn_implementation"), dtype=dtype)
+    if attn_impl is not None:
+        model_kwargs["attn_implementation"] = attn_impl
+    model_kwargs.update(_placement_kwargs(model_cfg))
 
+    _configure_tokenizer_threads(model_cfg)
     tokenizer = AutoTokenizer.from_pretrained(model_name)
     if tokenizer.pad_token is None:
         tokenizer.pad_token = tokenizer.eos_token
 
-    agents = []
-    for _ in range(num_agents):
-        agent = AutoModelForCausalLM.from_pretrained(model_name, **model_kwargs)
-        agents.append(agent)
+    # Load the checkpoint once; remaining agents are independent in-memory copies.
+    base_agent = AutoModelForCausalLM.from_pretrained(model_name, **model_kwargs)
+    agents = [base_agent]
+    for _ in range(1, num_agents):
+        agents.append(copy.deepcopy(base_agent))
+    _add_stop_tokens(agents, tokenizer, model_cfg.get("stop_strings"))
+    if bool(model_cfg.get("compile", False)):
+        # CoMLRL decodes with a growing KV cache and varying lengths, so CUDA-graph modes
+        # ("reduce-overhead") re-record per shape; they are opt-in via model.compile_mode.
+        _compile_agents(agents, mode=model_cfg.get("compile_mode") or None)
 
     magrpo_args = get_trainer_args(cfg)
     formatters = _build_formatters(cfg, num_agents=num_agents, tokenizer=tokenizer)
@@ -452,8 +452,14 @@ def compute_resource_limits(task: TaskSpec, *, num_agents: int) -> Dict[str, int
     return limits
 
 
-def score_house_builder(*, task: TaskSpec, world_scan_blocks: List[Dict[str, Any]]) -> Dict[str, Any]:
-    expected_map = build_expected_map(task)
+def score_house_builder(
+    *,
+    task: TaskSpec,
+    world_scan_blocks: List[Dict[str, Any]],
+    expected_map: Dict[Tuple[int, int, int], str] | None = None,
+) -> Dict[str, Any]:
+    if expected_map is None:
+        expected_map = build_expected_map(task)
 
     observed: Dict[Tuple[int, int, int], str] = {}
     for b in world_scan_blocks:
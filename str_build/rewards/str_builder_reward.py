@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, List, Mapping
+from typing import Any, Callable, Dict, List, Mapping, Tuple
 
 from LLM_Collab_Minecraft.str_build.utils.str_builder import (
     TaskSpec,
@@ -57,6 +57,15 @@ def _task_from_batch_item(item: Mapping[str, Any]) -> TaskSpec:
     )
 
 
+def _task_cache_key(task: TaskSpec) -> Tuple[Any, ...]:
+    return (
+        task.task_id,
+        tuple(task.local_bbox_from),
+        tuple(task.local_bbox_to),
+        tuple(task.target_rows_topdown),
+    )
+
+
 def get_reward_function(*, cfg: Dict[str, Any], num_agents: int) -> Callable[..., List[float]]:
     """Return a reward function for str_build using coverage and penalty ratios."""
     task_cfg = cfg.get("task") or {}
@@ -99,6 +108,20 @@ def get_reward_function(*, cfg: Dict[str, Any], num_agents: int) -> Callable[...
     debug_empty_char = "."
     debug_raw_output = False
 
+    expected_map_cache: Dict[Tuple[Any, ...], Dict[Tuple[int, int, int], str]] = {}
+
+    def _expected_map_for_task(task: TaskSpec) -> Dict[Tuple[int, int, int], str]:
+        key = _task_cache_key(task)
+        expected_map = expected_map_cache.get(key)
+        if expected_map is None:
+            expected_map, _owners = build_target_color_map(
+                task=task,
+                allowed_blocks_per_agent=allowed_blocks_per_agent,
+                num_agents=num_agents,
+            )
+            expected_map_cache[key] = expected_map
+        return expected_map
+
     def _block_to_color_initial(block_id: str) -> str:
         key = block_to_color_key(block_id)
         if key == "wood":
@@ -184,11 +207,7 @@ def get_reward_function(*, cfg: Dict[str, Any], num_agents: int) -> Callable[...
             )
 
             blocks = simulate_commands_to_scan_blocks(commands=accepted, world_bbox_from=world_bbox_from, world_bbox_to=world_bbox_to)
-            expected_map, _owners = build_target_color_map(
-                task=task,
-                allowed_blocks_per_agent=allowed_blocks_per_agent,
-                num_agents=num_agents,
-            )
+            expected_map = _expected_map_for_task(task)
             metrics = score_str_builder(
                 task=task,
                 world_scan_blocks=blocks,
@@ -264,11 +283,7 @@ def get_reward_function(*, cfg: Dict[str, Any], num_agents: int) -> Callable[...
 
         merged = [*accepted_1, *accepted_2]
         blocks = simulate_commands_to_scan_blocks(commands=merged, world_bbox_from=world_bbox_from, world_bbox_to=world_bbox_to)
-        expected_map, _owners = build_target_color_map(
-            task=task,
-            allowed_blocks_per_agent=allowed_blocks_per_agent,
-            num_agents=num_agents,
-        )
+        expected_map = _expected_map_for_task(task)
         metrics = score_str_builder(
             task=task,
             world_scan_blocks=blocks,
@@ -17,13 +17,6 @@ except Exception as e:  # pragma: no cover
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.insert(0, os.path.dirname(REPO_ROOT))
 
-from datasets import Dataset  # type: ignore
-from transformers import AutoTokenizer  # type: ignore
-import torch  # type: ignore
-
-from comlrl.trainers.actor_critic import MAACTrainer  # type: ignore
-from comlrl.utils.reward_processor import RewardProcessors  # type: ignore
-
 from LLM_Collab_Minecraft.str_build.external import (
     get_external_transition as external_get_transition,
     set_context_resolver as external_set_context_resolver,
@@ -32,7 +25,6 @@ from LLM_Collab_Minecraft.str_build.rewards.str_builder_reward import get_reward
 from LLM_Collab_Minecraft.str_build.utils.config import apply_overrides, load_yaml, resolve_path
 from LLM_Collab_Minecraft.str_build.utils.prompting import apply_graph_setting, apply_prompt_defaults
 from LLM_Collab_Minecraft.str_build.utils.str_builder import load_tasks_from_csv
-from LLM_Collab_Minecraft.str_build.utils.trainer_args import get_maac_args
 
 
 def _slice_items(items: List[Dict[str, Any]], split_expr: Any) -> List[Dict[str, Any]]:
@@ -54,6 +46,8 @@ def _slice_items(items: List[Dict[str, Any]], split_expr: Any) -> List[Dict[str,
 
 
 def _map_dtype(dtype_cfg: Any) -> Any:
+    import torch  # type: ignore
+
     if isinstance(dtype_cfg, torch.dtype):
         return dtype_cfg
     if not isinstance(dtype_cfg, str):
@@ -70,6 +64,31 @@ def _map_dtype(dtype_cfg: Any) -> Any:
     return None
 
 
+def _resolve_attn_implementation(attn_cfg: Any, *, dtype: Any) -> str | None:
+    import torch  # type: ignore
+
+    s = str(attn_cfg or "auto").strip()
+    if s.lower() not in ("auto", "flash_attention_2"):
+        return s
+    # "auto" leaves the choice to transformers unless FA2 is usable; an explicit FA2 request falls back to sdpa.
+    fallback = None if s.lower() == "auto" else "sdpa"
+    if not torch.cuda.is_available() or dtype not in (torch.bfloat16, torch.float16):
+        return fallback
+    try:
+        import flash_attn  # type: ignore  # noqa: F401
+    except ImportError:
+        return fallback
+    return "flash_attention_2"
+
+
+def _configure_tokenizer_threads(model_cfg: Dict[str, Any]) -> None:
+    # DataLoaders run without worker processes, so the fast tokenizer can keep its Rayon pool.
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "true")
+    threads = model_cfg.get("tokenizer_threads")
+    if threads is not None:
+        os.environ["RAYON_NUM_THREADS"] = str(int(threads))
+
+
 def _render_prompt(
     *,
     tokenizer: Any | None,
@@ -141,6 +160,8 @@ def _build_formatters(cfg: Dict[str, Any], *, num_agents: int, tokenizer: Any |
             return p.strip()
         return None
 
+    rendered_cache: Dict[str, str] = {}
+
     def _render(item: Dict[str, Any], tmpl: str) -> str:
         override = _prompt_override(item)
         if override is not None:
@@ -159,12 +180,16 @@ def _build_formatters(cfg: Dict[str, Any], *, num_agents: int, tokenizer: Any |
             block_agent1_lines=block_agent1_lines,
             block_agent2_lines=block_agent2_lines,
         ).rstrip()
-        return _render_prompt(
-            tokenizer=tokenizer,
-            system_prompt=system_prompt,
-            user_prompt=user,
-            use_chat_template=use_chat_template,
-        )
+        rendered = rendered_cache.get(user)
+        if rendered is None:
+            rendered = _render_prompt(
+                tokenizer=tokenizer,
+                system_prompt=system_prompt,
+                user_prompt=user,
+                use_chat_template=use_chat_template,
+            )
+            rendered_cache[user] = rendered
+        return rendered
 
     if num_agents == 1:
         return [lambda item: _render(item, user_template)]
@@ -251,6 +276,15 @@ def main() -> int:
     eval_split = dataset_cfg.get("eval_split")
     train_items = _slice_items(items, train_split)
     eval_items = _slice_items(items, eval_split) if eval_split else []
+    # Heavy imports are deferred so --help and config/dataset errors stay fast.
+    from datasets import Dataset  # type: ignore
+    from transformers import AutoTokenizer  # type: ignore
+
+    from comlrl.trainers.actor_critic import MAACTrainer  # type: ignore
+    from comlrl.utils.reward_processor import RewardProcessors  # type: ignore
+
+    from LLM_Collab_Minecraft.str_build.utils.trainer_args import get_maac_args
+
     train_ds = Dataset.from_list(train_items)
     eval_ds = Dataset.from_list(eval_items) if eval_items else None
 
@@ -268,7 +302,11 @@ def main() -> int:
     dtype = _map_dtype(model_cfg.get("dtype") or model_cfg.get("torch_dtype"))
     if dtype is not None:
         model_kwargs["torch_dtype"] = dtype
+    attn_impl = _resolve_attn_implementation(model_cfg.get("attn_implementation"), dtype=dtype)
+    if attn_impl is not None:
+        model_kwargs["attn_implementation"] = attn_impl
 
+    _configure_tokenizer_threads(model_cfg)
     tokenizer = AutoTokenizer.from_pretrained(model_name)
     if tokenizer.pad_token is None:
         tokenizer.pad_token = tokenizer.eos_token
@@ -409,6 +447,11 @@ def main() -> int:
     critic_dtype = _map_dtype(critic_cfg.get("dtype") or critic_cfg.get("torch_dtype"))
     if critic_dtype is not None:
         critic_model_kwargs["torch_dtype"] = critic_dtype
+    critic_attn_impl = _resolve_attn_implementation(
+        critic_cfg.get("attn_implementation"), dtype=critic_dtype
+    )
+    if critic_attn_impl is not None:
+        critic_model_kwargs["attn_implementation"] = critic_attn_impl
 
     trainer_kwargs: Dict[str, Any] = {
         "model": model_name,